@@ -7,6 +7,7 @@ import difflib
 import optparse
 import fnmatch
 import importlib
+import mmap
 from bisect import insort_left, bisect_left
 from collections import namedtuple
 
@@ -22,6 +23,11 @@ DIFF_LENGTH_MIN = float(config['report'].get('diff-line-min', 0.5))
 EXTENSIONS = [line.strip() for line in config['files'].get('extensions', '').split('\n') if line]
 EXCLUDE_GLOBS = [line.strip() for line in config['files'].get('exclude-path', '').split('\n') if line]
 DUP_IGNORE_LINE_RE = [re.compile(line.strip()) for line in config['files'].get('dup-ignore-line-re', '').split('\n') if line]
+MAX_LINE_LENGTH = int(config['files'].get('max-line-length', 500))
+MAX_AVG_LINE_LENGTH = int(config['files'].get('max-avg-line-length', 200))
+MAX_FILE_SIZE = int(config['files'].get('max-file-size', 4 * 1024 * 1024))
+MMAP_MIN_SIZE = int(config['files'].get('mmap-min-size', 64 * 1024))
+COUNT_SLICE_SIZE = 1024 * 1024
 
 dupskipfile = open('.redundantdupskip', 'a')
 def add_dup_skip(filepath):
@@ -107,9 +113,12 @@ def get_filetype(filepath):
 
 seen_files = {}
 def record_file(filepath):
+    lines = readfile(filepath)
+    if filepath in skipped_files:
+        return
     filerec = seen_files.setdefault(filepath, {
         "linecount": 0,
-        "lines": readfile(filepath),
+        "lines": lines,
     })
     # print("file:", filepath)
     filetype = get_filetype(filepath)
@@ -135,19 +144,84 @@ def check_file_ext(filename):
 
 line_files = {}
 longest_line_length = 0
+skipped_files = {}
+capped_files = {}
+
+def iter_line_spans(buf):
+    """Yields (start, end) offsets of each line in `buf`, including its newline.
+
+    Works on bytes and mmap objects alike, so large files are scanned without
+    copying them into memory.
+    """
+    start = 0
+    size = len(buf)
+    while start < size:
+        end = buf.find(b'\n', start)
+        end = size if end == -1 else end + 1
+        yield start, end
+        start = end
+
+def count_lines(buf):
+    """Counts the lines in `buf`, including a last line without a newline.
+
+    An mmap is counted in fixed-size slices so it is never copied whole.
+    """
+    if isinstance(buf, mmap.mmap):
+        newlines = 0
+        for start in range(0, len(buf), COUNT_SLICE_SIZE):
+            newlines += buf[start:start + COUNT_SLICE_SIZE].count(b'\n')
+    else:
+        newlines = buf.count(b'\n')
+    if buf[-1:] not in (b'', b'\n'):
+        newlines += 1
+    return newlines
+
+def check_generated(buf):
+    """Returns a reason to skip `buf` as generated or minified content, or None."""
+    size = len(buf)
+    linecount = count_lines(buf)
+    if linecount and MAX_AVG_LINE_LENGTH and size / linecount > MAX_AVG_LINE_LENGTH:
+        return "average line length %d over %d" % (size / linecount, MAX_AVG_LINE_LENGTH)
+    return None
+
 def readfile(filepath):
     global longest_line_length
     if filepath in seen_files:
         return seen_files[filepath]['lines']
-    lines = []
-    for linenum, bline in enumerate(open(filepath, 'rb'), 1):
-        tline = bline.decode('utf8', 'ignore')
-        tline_stripped = tline.strip()
-        longest_line_length = max(longest_line_length, len(tline_stripped))
-        record_line(filepath, linenum, tline)
-        line_files.setdefault(tline_stripped, {}).setdefault('files', {})[filepath] = linenum
-        lines.append(tline)
-    return lines
+    if filepath in skipped_files:
+        return []
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if MAX_FILE_SIZE and size > MAX_FILE_SIZE:
+            skipped_files[filepath] = "larger than %d bytes" % (MAX_FILE_SIZE,)
+            return []
+        if size and size >= MMAP_MIN_SIZE:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = f.read()
+    try:
+        reason = check_generated(buf)
+        if reason:
+            skipped_files[filepath] = reason
+            return []
+        lines = []
+        for linenum, (start, end) in enumerate(iter_line_spans(buf), 1):
+            tline = buf[start:end].decode('utf8', 'ignore')
+            tline_stripped = tline.strip()
+            # Overlong lines keep their place in the file, but are left out of
+            # the length index so they can't blow up the similarity searches.
+            if MAX_LINE_LENGTH and len(tline_stripped) > MAX_LINE_LENGTH:
+                capped_files[filepath] = capped_files.get(filepath, 0) + 1
+                record_line(filepath, linenum, tline, index=False)
+            else:
+                longest_line_length = max(longest_line_length, len(tline_stripped))
+                record_line(filepath, linenum, tline)
+                line_files.setdefault(tline_stripped, {}).setdefault('files', {})[filepath] = linenum
+            lines.append(tline)
+        return lines
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
 
 def report_similar_lines(line, orig_filepath):
     max_levenshtein = int(len(line) * 0.1)
@@ -209,6 +283,15 @@ def main():
                 if not is_excluded:
                     record_file(filepath)
 
+    if skipped_files:
+        with indent("Skipped %d generated or minified files:" % (len(skipped_files),)):
+            for filepath in sorted(skipped_files):
+                print("%s (%s)" % (filepath, skipped_files[filepath]))
+    if capped_files:
+        with indent("Ignored lines longer than %d characters in %d files:" % (MAX_LINE_LENGTH, len(capped_files))):
+            for filepath in sorted(capped_files):
+                print("%s (%d lines)" % (filepath, capped_files[filepath]))
+
     line_total = 0
     for filerec in seen_files.values():
         line_total += len(filerec['lines'])
@@ -18,62 +18,85 @@ class Chunk(object):
 
 class ChunkPair(object):
 
-    def __init__(self, left, right):
+    def __init__(self, left, right, score=None):
         self.left = left
         self.right = right
+        self.score = score
 
+    def merge(self, other):
+        """Absorbs an adjacent pair lying on the same diagonal into this one."""
+        total = self.score * len(self.left) + other.score * len(other.left)
+        length = len(self.left) + len(other.left)
+        for mine, theirs in ((self.left, other.left), (self.right, other.right)):
+            mine.startline = min(mine.startline, theirs.startline)
+            mine.endline = max(mine.endline, theirs.endline)
+        self.score = total / length
 
-def extend_chunks(start1, start2, start_score, min_score, min_lines):
-    from redundant import indent
-    length = 2
 
-    if start1.filepath == start2.filepath:
-        return
-
-    try:
-        next1 = lines.lines_by_filepath[start1.filepath][start1.linenum + 1]
-        next2 = lines.lines_by_filepath[start2.filepath][start2.linenum + 1]
-    except IndexError:
-        return
-    scores = [start_score]
-    scores.append(lines.score_line_diff(lines.line_diff(next1.stripped, next2.stripped)))
-
-    def cur_score():
-        return sum(scores) / len(scores)
-
-    while cur_score() >= min_score:
-        try:
-            next1 = lines.lines_by_filepath[next1.filepath][next1.linenum + 1]
-            next2 = lines.lines_by_filepath[next2.filepath][next2.linenum + 1]
-        except IndexError:
-            return
-        scores.append(lines.score_line_diff(lines.line_diff(next1.stripped, next2.stripped)))
+def line_after(line):
+    """Returns the Line following `line` in its file, or None at the end of the file."""
+    file_lines = lines.lines_by_filepath[line.filepath]
+    if line.linenum < len(file_lines):
+        return file_lines[line.linenum]
+    return None
+
+
+def find_covering(coverage, diagonal, linenum):
+    """Finds the emitted ChunkPair on `diagonal` whose left side covers `linenum`."""
+    for pair in coverage.get(diagonal, ()):
+        if pair.left.startline <= linenum <= pair.left.endline:
+            return pair
+    return None
+
+
+def extend_chunks(start1, start2, start_score, min_score, min_lines, coverage):
+    """Extends a pair of similar lines into a pair of similar chunks.
 
+    `coverage` maps each (filepath, filepath, line offset) diagonal to the
+    ChunkPairs already emitted on it. Start pairs inside one of those are
+    skipped, and a chunk that runs into one is merged with it rather than
+    walking the same lines again.
+
+    Returns the new or merged ChunkPair, or None.
+    """
+    if start1.filepath == start2.filepath:
+        return None
+    if start1.filepath > start2.filepath:
+        start1, start2 = start2, start1
+    diagonal = (start1.filepath, start2.filepath, start2.linenum - start1.linenum)
+    if find_covering(coverage, diagonal, start1.linenum):
+        return None
+
+    total = start_score
+    length = 1
+    next1, next2 = start1, start2
+    joined = None
+    while True:
+        next1 = line_after(next1)
+        next2 = line_after(next2)
+        if next1 is None or next2 is None:
+            break
+        joined = find_covering(coverage, diagonal, next1.linenum)
+        if joined:
+            break
+        score = lines.score_line_diff(lines.line_diff(next1.stripped, next2.stripped))
+        if (total + score) / (length + 1) < min_score:
+            break
+        total += score
         length += 1
 
-    if length >= min_lines:
-        print(
-            cur_score(),
-            start1.filepath, start1.linenum,
-            start2.filepath, start2.linenum,
-            "(%s lines)" % (length,)
-        )
-        for i in range(length):
-            print("    ",
-                lines.lines_by_filepath[start1.filepath][start1.linenum + i].line,
-            end="")
-        print("-----")
-        for i in range(length):
-            print("    ",
-                lines.lines_by_filepath[start2.filepath][start2.linenum + i].line,
-            end="")
-
-    # with indent():
-    #     print(start1.stripped)
-    #     print(next1.stripped)
-    #     print("")
-    #     print(start2.stripped)
-    #     print(next2.stripped)
+    pair = ChunkPair(
+        Chunk(start1.filepath, start1.linenum, start1.linenum + length - 1),
+        Chunk(start2.filepath, start2.linenum, start2.linenum + length - 1),
+        total / length,
+    )
+    if joined:
+        joined.merge(pair)
+        return joined
+    if length < min_lines:
+        return None
+    coverage.setdefault(diagonal, []).append(pair)
+    return pair
 
 
 def find_similar_chunks(file_data, line_files, min_line, max_line):
@@ -98,32 +121,32 @@ def find_similar_chunks(file_data, line_files, min_line, max_line):
     print("Found %d similar lines to start chunks..." % (len(starting_lines),))
 
     # Now try to extend these into chunks...
-    # somehow...
     MIN_LENGTH = int(config['chunks'].get('min-length', 10))
+    coverage = {}
     for line, simlines in starting_lines.items():
         for (simline, score) in simlines:
-            extend_chunks(line, simline, score, score - 0.2, MIN_LENGTH)
-    return
-    for line, simlines in starting_lines.items():
-        for (simline, score) in simlines:
-            if line.filepath == simline.filepath and line.linenum == simline.linenum:
-                continue
-            try:
-                ln_line = file_data[line.filepath]['lines'][line.linenum - 1]
-            except IndexError:
-                print("[ERROR]", line.filepath, line.linenum)
-                raise
-            try:
-                rn_line = file_data[simline.filepath]['lines'][simline.linenum - 1]
-            except IndexError:
-                print("[ERROR]", simline.filepath, simline.linenum)
-                raise
-            rn_score = lines.score_line_diff(lines.line_diff(line.stripped, simline.stripped))
-
-            print("[%s:%d]" % (line.filepath, line.linenum))
-            print(line.line.strip('\n'))
-            #print(ln_line.strip('\n'))
-            print("[%s:%d] (%0.2f)" % (simline.filepath, simline.linenum, rn_score))
-            print(simline.line.strip('\n'))
-            #print(rn_line.strip('\n'))
-            print("")
+            extend_chunks(line, simline, score, score - 0.2, MIN_LENGTH, coverage)
+
+    results = sorted(
+        (pair for pairs in coverage.values() for pair in pairs),
+        key=lambda pair: (pair.left.filepath, pair.left.startline, pair.right.filepath),
+    )
+    print("Found %d similar chunks." % (len(results),))
+    for pair in results:
+        print_chunk_pair(pair)
+    return results
+
+
+def print_chunk_pair(pair):
+    from redundant import indent, print
+
+    header = "%s:%d %s:%d (%d lines, %0.2f)" % (
+        pair.left.filepath, pair.left.startline,
+        pair.right.filepath, pair.right.startline,
+        len(pair.left), pair.score,
+    )
+    with indent(header):
+        for chunk in (pair.left, pair.right):
+            for line in lines.lines_by_filepath[chunk.filepath][chunk.startline - 1:chunk.endline]:
+                print(line.line.rstrip('\n'))
+            print("-----")
@@ -12,10 +12,11 @@ lines_by_length = {}
 lines_by_filepath = {}
 
 
-def record_line(filepath, linenum, line):
+def record_line(filepath, linenum, line, index=True):
     stripped = line.strip()
     line_rec = Line(filepath, linenum, line, stripped)
-    lines_by_length.setdefault(len(stripped), []).append(line_rec)
+    if index:
+        lines_by_length.setdefault(len(stripped), []).append(line_rec)
     lines_by_filepath.setdefault(filepath, []).append(line_rec)
 
 
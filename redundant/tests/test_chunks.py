@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from redundant import lines
+from redundant.chunks import extend_chunks
+
+
+CLONE = [
+    "def handle(self, request):\n",
+    "    form = self.form_class(request.POST)\n",
+    "    if form.is_valid():\n",
+    "        form.save()\n",
+    "        return redirect('home')\n",
+    "    return render(request, 'form.html')\n",
+]
+
+
+class ExtendChunksTestCase(TestCase):
+
+    def setUp(self):
+        lines.lines_by_length.clear()
+        lines.lines_by_filepath.clear()
+        for filepath, prefix in (("a.py", []), ("b.py", ["import os\n", "\n"])):
+            for linenum, line in enumerate(prefix + CLONE, 1):
+                lines.record_line(filepath, linenum, line)
+
+    def line(self, filepath, linenum):
+        return lines.lines_by_filepath[filepath][linenum - 1]
+
+    def test_extends_to_end_of_clone(self):
+        coverage = {}
+        pair = extend_chunks(self.line("a.py", 1), self.line("b.py", 3), 1.0, 0.8, 3, coverage)
+        self.assertEqual((pair.left.startline, pair.left.endline), (1, 6))
+        self.assertEqual((pair.right.startline, pair.right.endline), (3, 8))
+        self.assertEqual(pair.score, 1.0)
+
+    def test_skips_covered_start(self):
+        coverage = {}
+        extend_chunks(self.line("a.py", 1), self.line("b.py", 3), 1.0, 0.8, 3, coverage)
+        self.assertIsNone(extend_chunks(self.line("b.py", 5), self.line("a.py", 3), 1.0, 0.8, 3, coverage))
+        self.assertEqual(sum(len(pairs) for pairs in coverage.values()), 1)
+
+    def test_merges_into_later_chunk(self):
+        coverage = {}
+        later = extend_chunks(self.line("a.py", 3), self.line("b.py", 5), 1.0, 0.8, 3, coverage)
+        merged = extend_chunks(self.line("a.py", 1), self.line("b.py", 3), 1.0, 0.8, 3, coverage)
+        self.assertIs(merged, later)
+        self.assertEqual((merged.left.startline, merged.left.endline), (1, 6))
+        self.assertEqual(sum(len(pairs) for pairs in coverage.values()), 1)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import redundant
+from redundant import lines
+from redundant import check_generated, count_lines, iter_line_spans, readfile
+
+
+class IterLineSpansTestCase(TestCase):
+
+    def test_last_line_without_newline(self):
+        self.assertEqual(list(iter_line_spans(b'a\nbb')), [(0, 2), (2, 4)])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_line_spans(b'')), [])
+
+
+class CheckGeneratedTestCase(TestCase):
+
+    def test_count_lines(self):
+        self.assertEqual(count_lines(b''), 0)
+        self.assertEqual(count_lines(b'a\nbb'), 2)
+        self.assertEqual(count_lines(b'a\nbb\n'), 2)
+
+    def test_minified(self):
+        self.assertIsNotNone(check_generated(b'x=1;' * 10000 + b'\n'))
+
+    def test_average_at_limit(self):
+        line = b'x' * (redundant.MAX_AVG_LINE_LENGTH - 1) + b'\n'
+        self.assertIsNone(check_generated(line * 10))
+        self.assertIsNotNone(check_generated(b'x' + line * 10))
+
+
+class ReadFileTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.saved = (
+            redundant.MAX_FILE_SIZE,
+            redundant.MMAP_MIN_SIZE,
+            redundant.longest_line_length,
+        )
+        redundant.seen_files.clear()
+        redundant.skipped_files.clear()
+        redundant.capped_files.clear()
+        redundant.line_files.clear()
+        redundant.longest_line_length = 0
+        lines.lines_by_length.clear()
+        lines.lines_by_filepath.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        (
+            redundant.MAX_FILE_SIZE,
+            redundant.MMAP_MIN_SIZE,
+            redundant.longest_line_length,
+        ) = self.saved
+
+    def write(self, name, content):
+        filepath = os.path.join(self.tmpdir, name)
+        with open(filepath, 'wb') as f:
+            f.write(content)
+        return filepath
+
+    def check_overlong_line(self):
+        overlong = 'x' * (redundant.MAX_LINE_LENGTH + 1)
+        content = "import os\n%s\nprint(os.sep)" % (overlong,)
+        filepath = self.write('overlong.py', content.encode('utf8'))
+
+        result = readfile(filepath)
+
+        self.assertEqual(result, ["import os\n", overlong + "\n", "print(os.sep)"])
+        self.assertEqual(
+            [(line.linenum, line.line) for line in lines.lines_by_filepath[filepath]],
+            list(enumerate(result, 1)),
+        )
+        self.assertEqual(redundant.capped_files, {filepath: 1})
+        self.assertNotIn(len(overlong), lines.lines_by_length)
+        self.assertNotIn(overlong, redundant.line_files)
+        self.assertEqual(redundant.longest_line_length, len("print(os.sep)"))
+
+    def test_overlong_line(self):
+        self.check_overlong_line()
+
+    def test_overlong_line_mmap(self):
+        redundant.MMAP_MIN_SIZE = 1
+        self.check_overlong_line()
+
+    def test_empty_file(self):
+        redundant.MMAP_MIN_SIZE = 0
+        filepath = self.write('empty.py', b'')
+        self.assertEqual(readfile(filepath), [])
+        self.assertNotIn(filepath, redundant.skipped_files)
+
+    def test_file_size_limit(self):
+        redundant.MAX_FILE_SIZE = 10
+        self.assertEqual(readfile(self.write('small.py', b'x = 12345\n')), ["x = 12345\n"])
+        filepath = self.write('large.py', b'x = 123456\n')
+        self.assertEqual(readfile(filepath), [])
+        self.assertIn(filepath, redundant.skipped_files)
+        self.assertNotIn(filepath, lines.lines_by_filepath)